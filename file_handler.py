@@ -1,12 +1,129 @@
 import boto3
 import pandas as pd
 import numpy as np
-from io import StringIO
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.dataset as ds
+from pyarrow import fs
+import os
 import sys
+import time
+import hashlib
+from functools import partial
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from model_pipeline import model_pipeline
 ## Adding logger instead of print
 
+# Number of concurrent GetObject requests issued when reading a bucket.
+MAX_WORKERS = 16
+# Objects larger than this are downloaded as concurrent byte ranges.
+RANGED_GET_THRESHOLD = 64 * 1024 * 1024
+# Arrow-backed columns whose chunks average fewer elements than this are combined.
+MIN_CHUNK_ELEMENTS = 64 * 1024
+# A bucket listing younger than this (in seconds) is reused by clean_ml_bucket.
+LISTING_TTL = 300
+# Latest full listing of each bucket, shared by every handler for the same bucket and credentials, as
+# (key -> ETag, suffixes listed, time listed).
+_LISTING_CACHE = {}
+# Maximum number of keys accepted by a single DeleteObjects request.
+DELETE_BATCH_SIZE = 1000
+# S3 clients shared by every handler using the same credentials, so they share one connection pool.
+_CLIENT_CACHE = {}
+# Buckets loaded through load_bucket, with the ETag of every file they were read from; at most
+# BUCKET_CACHE_SIZE of them are kept.
+BUCKET_CACHE_SIZE = 4
+_BUCKET_CACHE = {}
+# Number of listing pages read one after another before the rest of a bucket is listed as parallel
+# StartAfter ranges; buckets up to this many pages are listed exactly as a single paginator would.
+SHARD_AFTER_PAGES = 5
+# Object types read from a bucket, and deleted from it by clean_ml_bucket.
+READ_SUFFIXES = ('.csv', '.parquet')
+# Size of the blocks a filtered .csv object is parsed and filtered in, roughly 200k rows.
+CSV_BLOCK_SIZE = 16 * 1024 * 1024
+# bvn and application_id are parsed as Arrow strings once and kept that way, so the merges on them
+# never need an astype(str).
+STRING_DTYPE = pd.ArrowDtype(pa.string())
+ID_COLUMN_TYPES = {'bvn': pa.string(), 'application_id': pa.string()}
+
+
+def _credential_hash(credential):
+    """
+    Returns a digest identifying a credential in the module-level caches without holding it, or None
+    for a credential left to boto3's default credential chain.
+    """
+    return None if credential is None else hashlib.sha256(credential.encode()).hexdigest()
+
+
+def _get_s3_client(access_key, secret_access_key):
+    """
+    Returns the S3 client for these credentials, creating it on first use.
+    boto3 clients are thread-safe, so one client serves every handler and worker thread.
+    """
+    key = (access_key, _credential_hash(secret_access_key))
+    if key not in _CLIENT_CACHE:
+        _CLIENT_CACHE[key] = boto3.client(
+            's3',
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_access_key,
+            config=Config(
+                max_pool_connections=64,
+                retries={'mode': 'adaptive', 'max_attempts': 10},
+                tcp_keepalive=True
+            )
+        )
+    return _CLIENT_CACHE[key]
+
+
+def _rechunk(df):
+    """
+    Combines the chunks of Arrow-backed columns left fragmented by concatenating many small files.
+    Columns whose chunks are already large enough are left untouched.
+    """
+    for col in df.columns:
+        if not isinstance(df[col].dtype, pd.ArrowDtype):
+            continue
+        chunked = pa.array(df[col].array)
+        if isinstance(chunked, pa.ChunkedArray) and chunked.num_chunks > 1 and len(chunked) / chunked.num_chunks < MIN_CHUNK_ELEMENTS:
+            df[col] = pd.arrays.ArrowExtensionArray(chunked.combine_chunks())
+    return df
+
+
+def _shard_bounds(listed_keys):
+    """
+    Returns the sorted StartAfter boundaries, at most MAX_WORKERS of them, splitting the keys that
+    follow listed_keys, the sorted keys of the pages listed so far. Those keys vary from the first
+    position where the first and last of them differ, so a boundary is placed after the common
+    prefix at every character seen in that position or the next one. Keys with any other character
+    still fall into one of the ranges; the boundaries only decide how the work is split.
+    """
+    first_key, last_key = listed_keys[0], listed_keys[-1]
+    differ = len(os.path.commonprefix([first_key, last_key]))
+    chars = {key[position] for key in listed_keys for position in (differ, differ + 1) if position < len(key)}
+    bounds = sorted(bound for bound in (last_key[:differ] + char for char in chars) if bound > last_key)
+    if len(bounds) > MAX_WORKERS:
+        step = len(bounds) / MAX_WORKERS
+        bounds = [bounds[int(i * step)] for i in range(MAX_WORKERS)]
+    return bounds
+
+
+def _concat_tables_to_pandas(tables):
+    """
+    Concatenates pyarrow Tables into one Arrow-backed DataFrame.
+    Columns left to type inference can come out with incompatible types in different files
+    (e.g. date32 in one and timestamp in another); Arrow refuses to merge those, so such tables
+    are converted one by one and joined with pd.concat, which upcasts the column instead.
+    """
+    try:
+        table = pa.concat_tables(tables, promote_options='permissive')
+    except (pa.ArrowTypeError, pa.ArrowInvalid):
+        return pd.concat([part.to_pandas(types_mapper=pd.ArrowDtype) for part in tables], ignore_index=True)
+    # Arrow concatenation only links the chunks; the data is copied once, by to_pandas
+    return table.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
+
 
 class S3FileHandler:
     """
@@ -16,86 +133,419 @@ class S3FileHandler:
         self.bucket_name = bucket_name
         self.access_key = access_key
         self.secret_access_key = secret_access_key
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_access_key
-        )
+        self.s3_client = _get_s3_client(access_key, secret_access_key)
+        self._last_listed_keys = None
         
-    def check_s3_bucket_exists(self):
+    def check_s3_bucket_exists(self, columns=None, filters=None, column_types=None):
         """
         This method is used to check if the provided s3 path does exist.
-        Uses the list_csv_files method to return all the files in the bucket as a list.
-        Uses the read_csv_from_s3 method to read all the files as a Data Frame.
+        Lists the .csv and .parquet files in the bucket and reads them as a Data Frame,
+        using read_parquet_from_s3 and read_csv_from_s3 respectively.
+
+        Args:
+            columns (list, optional): Columns to read from each file. Defaults to all columns.
+            filters (pyarrow.compute.Expression, optional): Row filter applied while reading.
+            column_types (dict, optional): pyarrow types to parse .csv columns as, instead of inferring them.
         """
         try:
             self.s3_client.head_bucket(Bucket=self.bucket_name)
             print(f"Bucket '{self.bucket_name}' exists.")
-            csv_files = self.list_csv_files()
-            return self.read_csv_from_s3(csv_files)
+            files = self._list_files(READ_SUFFIXES)
+            return self._read_files(files, columns=columns, filters=filters, column_types=column_types)[0]
         except ClientError as e:
             print(f"Bucket '{self.bucket_name}' does not exist or you do not have access. Error: {e}")
             sys.exit(1)  # Exit the script if the bucket does not exist or there's an error
 
-    def list_csv_files(self):
+    def _read_files(self, files, columns=None, filters=None, column_types=None):
+        """
+        Reads a mix of .csv and .parquet keys into a single DataFrame, with the arguments of
+        check_s3_bucket_exists. Returns the DataFrame and the set of keys that were read; .csv
+        files that failed to download are reported and left out of both, and of the cached listing
+        clean_ml_bucket deletes from.
+        """
+        parquet_files = [key for key in files if key.endswith('.parquet')]
+        csv_files = [key for key in files if key.endswith('.csv')]
+        read = self._read_csv_tables(csv_files, columns=columns, filters=filters, column_types=column_types)
+        read_keys = {file_key for file_key, _ in read}.union(parquet_files)
+        self._uncache_unread(set(csv_files).difference(read_keys))
+        if not parquet_files:
+            return self._csv_tables_to_frame(read), read_keys
+
+        parquet_df = self.read_parquet_from_s3(parquet_files, columns=columns, filters=filters)
+        if not csv_files:
+            return parquet_df, read_keys
+        csv_df = self._csv_tables_to_frame(read)
+        return pd.concat([parquet_df, csv_df], ignore_index=True), read_keys
+
+    def load_bucket(self, refresh=False, columns=None, column_types=None):
+        """
+        Reads the whole bucket like check_s3_bucket_exists, but reuses the copy loaded by any handler
+        for the same bucket and credentials. The bucket is listed on every call and only files whose
+        ETag changed since they were cached are downloaded again.
+
+        Args:
+            refresh (bool, optional): Ignore any cached copy and read the bucket again. Defaults to False.
+            columns (list, optional): Columns to read from each file. Defaults to all columns.
+            column_types (dict, optional): pyarrow types to parse .csv columns as, instead of inferring them.
+
+        Returns:
+            DataFrame: Merged DataFrame of all files in the bucket.
+        """
+        key = self._bucket_key() + (
+            tuple(columns) if columns is not None else None,
+            frozenset((column_types or {}).items())
+        )
+        files = self._list_files(READ_SUFFIXES)
+        etags = dict(self._last_listed_keys)
+        cached = None if refresh else _BUCKET_CACHE.pop(key, None)
+
+        if cached is not None and cached[0] == etags:
+            df = cached[1]
+        else:
+            unchanged = set()
+            if cached is not None and 'file_key' in cached[1].columns:
+                unchanged = {file_key for file_key in files if cached[0].get(file_key) == etags[file_key]}
+            changed = [file_key for file_key in files if file_key not in unchanged]
+
+            frames = []
+            if unchanged:
+                # Keep the rows of files that did not change; removed files drop out here too
+                frames.append(cached[1][cached[1]['file_key'].isin(unchanged)])
+            if changed or not frames:
+                changed_df, read_keys = self._read_files(changed, columns=columns, column_types=column_types)
+                frames.append(changed_df)
+                # Files that failed to download are left out of the cached ETags, so the next call
+                # sees them as changed and tries them again
+                for file_key in changed:
+                    if file_key not in read_keys:
+                        del etags[file_key]
+            df = frames[0].reset_index(drop=True) if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+        if len(_BUCKET_CACHE) >= BUCKET_CACHE_SIZE:
+            del _BUCKET_CACHE[next(iter(_BUCKET_CACHE))]  # evict the least recently loaded bucket
+        _BUCKET_CACHE[key] = (etags, df)
+        # Callers assign columns on the result, so hand out a copy that cannot alter the cache
+        return df.copy(deep=False)
+
+    def _bucket_key(self):
+        """
+        Identifies this bucket and access key in the module-level caches, without holding the raw key.
+        """
+        return (self.bucket_name, _credential_hash(self.access_key))
+
+    def list_csv_files(self, prefixes=None):
         """
         Lists all .csv objects in an S3 bucket and returns them as a list.
+
+        Args:
+            prefixes (list, optional): Key prefixes listed in parallel. See _list_files.
+        """
+        return self._list_files('.csv', prefixes=prefixes)
+
+    def list_parquet_files(self, prefixes=None):
+        """
+        Lists all .parquet objects in an S3 bucket and returns them as a list.
+
+        Args:
+            prefixes (list, optional): Key prefixes listed in parallel. See _list_files.
         """
+        return self._list_files('.parquet', prefixes=prefixes)
+
+    def _list_files(self, suffix, prefixes=None):
+        """
+        Lists all objects in an S3 bucket whose key ends with suffix (a string or tuple of strings).
+
+        When prefixes is given each prefix is paginated on its own thread; the prefixes must cover
+        every key of interest. Otherwise the first SHARD_AFTER_PAGES pages are listed one after another,
+        and the rest of larger buckets is listed as StartAfter ranges in parallel (see _shard_bounds).
+        """
+        full_listing = prefixes is None
         try:
             paginator = self.s3_client.get_paginator('list_objects_v2')
-            csv_files = [
-                obj['Key'] for page in paginator.paginate(Bucket=self.bucket_name)
-                for obj in page.get('Contents', []) if obj['Key'].endswith('.csv')
-            ]
-            return csv_files
+            if prefixes is None:
+                files, ranges = self._list_head(paginator, suffix)
+                tasks = [partial(self._list_range, paginator, suffix, *bounds) for bounds in ranges]
+            else:
+                files = []
+                tasks = [partial(self._list_prefix, paginator, suffix, prefix) for prefix in prefixes]
+            if tasks:
+                with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                    for part in pool.map(lambda task: task(), tasks):
+                        files.extend(part)
+            listing = dict(files)  # key -> ETag
+            files = sorted(listing)  # keep the lexicographic order of an unsharded listing
+
+            self._last_listed_keys = listing
+            if full_listing:
+                suffixes = (suffix,) if isinstance(suffix, str) else tuple(suffix)
+                _LISTING_CACHE[self._bucket_key()] = (listing, suffixes, time.monotonic())
+            return files
         except ClientError as e:
             print(f"An error occurred while listing objects in the bucket: {e}")
             sys.exit(1)  # Exit the script if there is an error
 
-    def read_csv_from_s3(self, csv_files):
+    def _list_prefix(self, paginator, suffix, prefix=''):
+        """
+        Paginates the keys under prefix and returns the matching (key, ETag) pairs.
+        """
+        files = []
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+            files.extend(self._filter_page(page, suffix))
+        return files
+
+    def _list_head(self, paginator, suffix):
+        """
+        Paginates the bucket for up to SHARD_AFTER_PAGES pages and returns the matching (key, ETag)
+        pairs, and the (start_after, end) ranges left to list, end included and None for the last
+        range. No ranges are returned when the listing ended within those pages.
+        """
+        files, listed_keys = [], []
+        for number, page in enumerate(paginator.paginate(Bucket=self.bucket_name), 1):
+            files.extend(self._filter_page(page, suffix))
+            listed_keys.extend(obj['Key'] for obj in page.get('Contents', []))
+            if number == SHARD_AFTER_PAGES and page.get('IsTruncated'):
+                bounds = _shard_bounds(listed_keys)
+                return files, list(zip([listed_keys[-1]] + bounds, bounds + [None]))
+        return files, []
+
+    def _list_range(self, paginator, suffix, start_after, end=None):
+        """
+        Paginates the keys after start_after up to and including end (to the end of the bucket when
+        end is None) and returns the matching (key, ETag) pairs.
+        """
+        files = []
+        for page in paginator.paginate(Bucket=self.bucket_name, StartAfter=start_after):
+            contents = page.get('Contents', [])
+            if end is not None and contents and contents[-1]['Key'] > end:
+                files.extend(self._filter_page({'Contents': [obj for obj in contents if obj['Key'] <= end]}, suffix))
+                break
+            files.extend(self._filter_page(page, suffix))
+        return files
+
+    @staticmethod
+    def _filter_page(page, suffix):
+        """
+        Returns the (key, ETag) pairs of a list_objects_v2 page whose key ends with suffix.
+        """
+        return [(obj['Key'], obj['ETag']) for obj in page.get('Contents', []) if obj['Key'].endswith(suffix)]
+
+    def _read_csv_object(self, file_key, columns=None, filters=None, column_types=None):
+        """
+        Downloads and parses a single .csv object into a pyarrow Table.
+        Small objects are parsed straight from the streaming body, so the raw file is never held
+        in memory; large objects are fetched as concurrent byte ranges.
+        When filters is given the object is parsed in CSV_BLOCK_SIZE blocks and each block is
+        filtered before the next one is parsed, so dropped rows never accumulate.
+
+        Args:
+            file_key (str): Key of the object to read.
+            columns (list, optional): Columns to parse. Defaults to all columns.
+            filters (pyarrow.compute.Expression, optional): Row filter applied to each block.
+            column_types (dict, optional): pyarrow types to parse columns as. Others are inferred.
+
+        Returns:
+            pyarrow.Table: The parsed file.
+        """
+        # Empty cells are read as nulls, like pd.read_csv, so isna() still finds unprocessed rows.
+        # Requested columns missing from the file are added as nulls, as pd.concat did
+        convert_options = pacsv.ConvertOptions(
+            include_columns=columns, include_missing_columns=True, column_types=column_types,
+            strings_can_be_null=True, quoted_strings_can_be_null=True
+        )
+        obj = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
+        content_length = obj['ContentLength']
+        if content_length > RANGED_GET_THRESHOLD:
+            obj['Body'].close()
+            body = pa.BufferReader(self._get_object_ranged(file_key, content_length=content_length))
+        else:
+            body = obj['Body']
+
+        with body:
+            if filters is None:
+                return pacsv.read_csv(body, convert_options=convert_options)
+
+            read_options = pacsv.ReadOptions(block_size=CSV_BLOCK_SIZE)
+            reader = pacsv.open_csv(body, read_options=read_options, convert_options=convert_options)
+            blocks = [pa.Table.from_batches([batch]).filter(filters) for batch in reader]
+            return pa.concat_tables(blocks) if blocks else reader.schema.empty_table()
+
+    def _get_object_ranged(self, file_key, part_size=8 * 1024 * 1024, workers=8, content_length=None):
+        """
+        Downloads a large object as concurrent byte ranges and reassembles it in memory.
+
+        Args:
+            file_key (str): Key of the object to download.
+            part_size (int, optional): Size in bytes of each ranged GetObject. Defaults to 8 MiB.
+            workers (int, optional): Number of ranges downloaded at once. Defaults to 8.
+            content_length (int, optional): Size of the object, if already known. A HEAD
+            request is issued to find it otherwise.
+
+        Returns:
+            bytearray: The full body of the object.
+        """
+        if content_length is None:
+            content_length = self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)['ContentLength']
+
+        buf = bytearray(content_length)
+        view = memoryview(buf)
+
+        def fetch_part(start):
+            end = min(start + part_size, content_length) - 1
+            obj = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key, Range=f"bytes={start}-{end}")
+            view[start:end + 1] = obj['Body'].read()
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # list() re-raises the first ClientError from any part
+            list(pool.map(fetch_part, range(0, content_length, part_size)))
+
+        return buf
+
+    def read_csv_from_s3(self, csv_files, columns=None, filters=None, column_types=None):
         """
         Reads CSV files from an S3 bucket into Pandas DataFrames and joins them
         if the files were more than one.
 
         Args:
             csv_files (list): List of .csv file keys returned by list_csv_files method.
+            columns (list, optional): Columns to parse from each file. Defaults to all columns.
+            filters (pyarrow.compute.Expression, optional): Row filter applied while parsing.
+            column_types (dict, optional): pyarrow types to parse columns as. Others are inferred.
 
         Returns:
             DataFrame: Merged DataFrame of all .csv files.
         """
-        dataframes = []
-        for file_key in csv_files:
-            try:
-                obj = self.s3_client.get_object(Bucket=self.bucket_name, Key=file_key)
-                df = pd.read_csv(StringIO(obj['Body'].read().decode('utf-8')))
-                df['file_key'] = file_key  # Add file_key as a new column
-                dataframes.append(df)
-            except ClientError as e:
-                print(f"An error occurred while reading the file {file_key}: {e}")
+        read = self._read_csv_tables(csv_files, columns=columns, filters=filters, column_types=column_types)
+        return self._csv_tables_to_frame(read)
+
+    def _read_csv_tables(self, csv_files, columns=None, filters=None, column_types=None):
+        """
+        Downloads and parses csv_files concurrently, with the arguments of read_csv_from_s3.
+        Returns (file_key, pyarrow.Table) pairs in csv_files order; files that failed are reported
+        and left out.
+        """
+        tables = {}
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {
+                pool.submit(self._read_csv_object, file_key, columns, filters, column_types): file_key
+                for file_key in csv_files
+            }
+            for future in as_completed(futures):
+                file_key = futures[future]
+                try:
+                    tables[file_key] = future.result()
+                except ClientError as e:
+                    print(f"An error occurred while reading the file {file_key}: {e}")
+
+        # Keep listing order so the merged DataFrame does not depend on download timing
+        return [(file_key, tables.pop(file_key)) for file_key in csv_files if file_key in tables]
 
-        if dataframes:
-            merged_df = pd.concat(dataframes, ignore_index=True)
+    @staticmethod
+    def _csv_tables_to_frame(read):
+        """
+        Concatenates the (file_key, pyarrow.Table) pairs from _read_csv_tables into one DataFrame
+        with a file_key column.
+        """
+        if read:
+            merged_df = _rechunk(_concat_tables_to_pandas([part for _, part in read]))
+            # Build the file_key column once for all files instead of one column per file
+            lengths = np.fromiter((part.num_rows for _, part in read), dtype=np.int64)
+            keys = np.array([file_key for file_key, _ in read], dtype=object)
+            merged_df['file_key'] = np.repeat(keys, lengths)
         else:
             merged_df = pd.DataFrame()  # Return an empty DataFrame if no dataframes were read
             print("No dataframes to merge")
 
         return merged_df
 
+    def read_parquet_from_s3(self, parquet_files, columns=None, filters=None):
+        """
+        Reads Parquet files from an S3 bucket into a single Pandas DataFrame.
+        Only the requested columns and the row groups matching filters are fetched.
+
+        Args:
+            parquet_files (list): List of .parquet file keys returned by list_parquet_files method.
+            columns (list, optional): Columns to read. Defaults to all columns.
+            filters (pyarrow.compute.Expression, optional): Row filter pushed down to the scan.
+
+        Returns:
+            DataFrame: Merged DataFrame of all .parquet files, with a file_key column.
+        """
+        s3_fs = fs.S3FileSystem(
+            access_key=self.access_key,
+            secret_key=self.secret_access_key,
+            region=fs.resolve_s3_region(self.bucket_name),
+            # Same retry budget as the boto3 client
+            retry_strategy=fs.AwsStandardS3RetryStrategy(max_attempts=10)
+        )
+        dataset = ds.dataset(
+            [f"{self.bucket_name}/{key}" for key in parquet_files], format='parquet', filesystem=s3_fs
+        )
+
+        tables = []
+        for fragment in dataset.get_fragments(filter=filters):
+            table = fragment.to_table(schema=dataset.schema, columns=columns, filter=filters)
+            file_key = fragment.path.split('/', 1)[1]
+            tables.append(table.append_column('file_key', pa.array([file_key] * len(table), pa.string())))
+
+        if not tables:
+            print("No dataframes to merge")
+            return pd.DataFrame()
+        return _rechunk(pa.concat_tables(tables).to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True))
+
+    def _uncache_unread(self, unread):
+        """
+        Drops keys that failed to read from this bucket's cached listing, so clean_ml_bucket leaves
+        them in the bucket for the next run.
+        """
+        cached = _LISTING_CACHE.get(self._bucket_key())
+        if unread and cached is not None:
+            listing, suffixes, listed_at = cached
+            listing = {key: etag for key, etag in listing.items() if key not in unread}
+            _LISTING_CACHE[self._bucket_key()] = (listing, suffixes, listed_at)
+
+    def _cached_files(self):
+        """
+        Returns the READ_SUFFIXES keys from the last full listing of this bucket, made by any handler,
+        if it is recent enough and covered those suffixes, otherwise None.
+        """
+        cached = _LISTING_CACHE.get(self._bucket_key())
+        if cached is None:
+            return None
+        listing, suffixes, listed_at = cached
+        if time.monotonic() - listed_at > LISTING_TTL or not set(READ_SUFFIXES).issubset(suffixes):
+            return None
+        return [key for key in listing if key.endswith(READ_SUFFIXES)]
+
+    def _delete_batch(self, keys):
+        """
+        Deletes one batch of at most DELETE_BATCH_SIZE keys and returns the number of keys sent.
+        """
+        delete_objects = {'Objects': [{'Key': key} for key in keys]}
+        self.s3_client.delete_objects(Bucket=self.bucket_name, Delete=delete_objects)
+        return len(keys)
+
     def clean_ml_bucket(self):
         """
-        Deletes all .csv files from the S3 bucket.
+        Deletes all the files the readers consume (READ_SUFFIXES: .csv and .parquet) from the S3 bucket.
+        Reuses the listing made while reading the bucket, less the files that failed to read, so files
+        added or left unread since are kept. Without a recent listing the bucket is listed again.
         """
-        files_to_delete = self.list_csv_files()
+        files_to_delete = self._cached_files()
+        if files_to_delete is None:
+            files_to_delete = self._list_files(READ_SUFFIXES)
 
         if files_to_delete:
-            delete_objects = {'Objects': [{'Key': key} for key in files_to_delete]}
+            keys = iter(files_to_delete)
+            batches = iter(lambda: list(islice(keys, DELETE_BATCH_SIZE)), [])
             try:
-                self.s3_client.delete_objects(Bucket=self.bucket_name, Delete=delete_objects)
-                print(f"Deleted {len(files_to_delete)} .csv files from {self.bucket_name}")
+                with ThreadPoolExecutor(max_workers=8) as pool:
+                    deleted = sum(pool.map(self._delete_batch, batches))
+                _LISTING_CACHE.pop(self._bucket_key(), None)  # the cached listing no longer reflects the bucket
+                print(f"Deleted {deleted} .csv and .parquet files from {self.bucket_name}")
             except ClientError as e:
                 print(f"An error occurred while deleting objects: {e}")
         else:
-            print("No .csv files found in the bucket")
+            print("No .csv or .parquet files found in the bucket")
 
 
 class ApplicationProcessor(S3FileHandler):
@@ -110,20 +560,27 @@ class ApplicationProcessor(S3FileHandler):
         This method uses check_s3_bucket_exists method to check if the provided s3 path does exist, 
         rename the column of the read files if the file is not empty.
         """
-        trans_data = self.check_s3_bucket_exists()
+        float_columns = [
+            'amount_requested', 'airtime_in_90days', 'bill_payment_in_90days', 'cable_tv_in_90days',
+            'deposit_in_90days', 'easy_payment_in_90days', 'farmer_in_90days', 'inter_bank_in_90days',
+            'mobile_in_90days', 'utility_bills_in_90days', 'withdrawal_in_90days'
+        ]
+        columns = ['bvn', 'application_id', 'amount_requested', 'date_created'] + float_columns[1:]
+        # Every projected column has a fixed type, so a filtered read never infers types from its first
+        # block alone. application_id stays float64 at parse time since it may be written as e.g. '1001.0';
+        # date_created stays a string and is parsed by convert_columns
+        column_types = {
+            'bvn': pa.string(), 'application_id': pa.float64(), 'date_created': pa.string(),
+            **{col: pa.float32() for col in float_columns}
+        }
+        # Only these columns, and rows with an application_id, are kept while the files are parsed
+        trans_data = self.check_s3_bucket_exists(
+            columns=columns, filters=pc.field('application_id').is_valid(), column_types=column_types
+        )
         if not trans_data.empty:
-            columns = [
-                'bvn', 'application_id', 'amount_requested', 'date_created', 'airtime_in_90days',
-                'bill_payment_in_90days', 'cable_tv_in_90days', 'deposit_in_90days', 'easy_payment_in_90days',
-                'farmer_in_90days', 'inter_bank_in_90days', 'mobile_in_90days', 'utility_bills_in_90days',
-                'withdrawal_in_90days'
-            ]
-
-            trans_data = trans_data[columns]
-            trans_data = trans_data[~trans_data['application_id'].isnull()]
-            trans_data.reset_index(drop=True, inplace=True)
+            trans_data = trans_data.drop(columns='file_key')
             trans_data['application_id'] = trans_data['application_id'].astype(int)
-            trans_data.fillna(0.0, inplace=True)
+            trans_data.fillna({col: 0.0 for col in float_columns}, inplace=True)
         else:
             print(f"{self.bucket_name} does not exist or could not be accessed.")
         
@@ -142,14 +599,18 @@ class ApplicationProcessor(S3FileHandler):
         Returns:
         pd.DataFrame: The DataFrame with converted columns.
         """
+        astype_map = {}
         for col, dtype in column_types.items():
-            if col in df.columns:
-                if dtype == 'date':
-                    df[col] = pd.to_datetime(df[col]).dt.date
-                else:
-                    df[col] = df[col].astype(dtype)
-            else:
+            if col not in df.columns:
                 print(f"Warning: Column '{col}' does not exist in the DataFrame.")
+            elif dtype == 'date':
+                # Midnight timestamps keep the calendar date without boxing datetime.date objects
+                df[col] = pd.to_datetime(df[col]).dt.normalize()
+            else:
+                astype_map[col] = dtype
+        # Convert every other column in one astype call
+        if astype_map:
+            df = df.astype(astype_map)
         return df
 
     
@@ -167,21 +628,26 @@ class ApplicationProcessor(S3FileHandler):
         do_good_reader_instance = S3FileHandler(do_good_bucket_name, self.access_key, self.secret_access_key)
         
         columns_ = ['bvn', 'applicationID', 'date_of_default', 'outstanding_balance']
-        do_good = do_good_reader_instance.check_s3_bucket_exists()[columns_]
-
-        merged_df = df.merge(do_good, on='bvn', how='left')
-        merged_df['date_of_default'] = pd.to_datetime(merged_df['date_of_default'], errors='coerce')
-        current_date = pd.Timestamp.now()
-        merged_df['default_in_last_90days'] = np.where(
-            ((current_date - merged_df['date_of_default']).dt.days <= 90) & (merged_df['outstanding_balance'] != 0), 
-            'Y', 
-            'N'
-        )
-        merged_df['has_it_make_it_good'] = np.where(
-            (merged_df['outstanding_balance'] == 0) | (merged_df['default_in_last_90days'] == 'N'), 
-            'Y', 
-            'N'
-        )
+        # Only the columns used below are parsed
+        do_good = do_good_reader_instance.load_bucket(columns=columns_, column_types={'bvn': pa.string()})[columns_]
+
+        # Both bvn columns are Arrow strings, so the join hashes them without a cast. A bvn can
+        # default more than once, so the do-good side is not validated as unique.
+        merged_df = df.merge(do_good, on='bvn', how='left', sort=False)
+        date_of_default = pd.to_datetime(merged_df['date_of_default'], errors='coerce')
+        # Compare defaults as int64 nanoseconds: '(now - date).days <= 90' means the default happened
+        # less than 91 whole days ago. NaT is the smallest int64, so it never counts as recent.
+        default_ns = date_of_default.to_numpy(dtype='datetime64[ns]', na_value=np.datetime64('NaT')).view('i8')
+        cutoff_ns = (pd.Timestamp.now() - pd.Timedelta(days=91)).value
+        balance = merged_df['outstanding_balance'].to_numpy(dtype='float64', na_value=np.nan)
+        recent_default = default_ns > cutoff_ns
+        recent_default &= balance != 0
+        # A zero balance is never a recent default, so '(balance == 0) | not recent default'
+        # reduces to 'not recent default'
+        made_good = ~recent_default
+        # bool arrays are viewed as int8 codes without copying
+        merged_df['default_in_last_90days'] = pd.Categorical.from_codes(recent_default.view(np.int8), categories=['N', 'Y'])
+        merged_df['has_it_make_it_good'] = pd.Categorical.from_codes(made_good.view(np.int8), categories=['N', 'Y'])
         merged_df.drop(columns=['date_of_default', 'outstanding_balance', 'applicationID'], inplace=True)
         
         return merged_df
@@ -205,21 +671,11 @@ def ml_orchestrator(access_key, secret_access_key, bucket_name='scetru-ml-bucket
     # read the data from seetru_ml_bucket
     trans_data = processor.read_data()
     
+    # The float columns are already parsed as float32 by read_data
     column_types = {
-    'bvn': 'object',
-    'application_id': 'object',
-    'amount_requested': 'float',
+    'bvn': STRING_DTYPE,
+    'application_id': STRING_DTYPE,
     'date_created': 'date',
-    'airtime_in_90days': 'float',
-    'bill_payment_in_90days': 'float',
-    'cable_tv_in_90days': 'float',
-    'deposit_in_90days': 'float',
-    'easy_payment_in_90days': 'float',
-    'farmer_in_90days': 'float',
-    'inter_bank_in_90days': 'float',
-    'mobile_in_90days': 'float',
-    'utility_bills_in_90days': 'float',
-    'withdrawal_in_90days': 'float',
     }
     
     #trans_data = read_data('scetru-ml-bucket', access_key, secret_access_key)
@@ -228,13 +684,34 @@ def ml_orchestrator(access_key, secret_access_key, bucket_name='scetru-ml-bucket
         trans_data = processor.convert_columns(trans_data, column_types)
         trans_data = processor.merge_with_do_good('scetru-fcmb-do-good-table', trans_data)
         trans_data_ = model_pipeline(trans_data)
-        trans_data_['application_id'] = trans_data_['application_id'].astype(str)
-        trans_data_['bvn'] = trans_data_['bvn'].astype(str)
         return trans_data_
     else:
         return f"no data for processing in scetru-ml-bucket"
 
 
+def _unprocessed_mask(complete_table):
+    """
+    Returns a boolean array marking the rows of the complete table that have neither a
+    decline_reason nor an amount_approved, i.e. applications not yet processed.
+    """
+    return np.logical_and(
+        complete_table['decline_reason'].isna().to_numpy(),
+        complete_table['amount_approved'].isna().to_numpy()
+    )
+
+
+def _ensure_string_ids(complete_table):
+    """
+    Converts application_id and bvn to Arrow strings where they are not strings already.
+    ID_COLUMN_TYPES only applies to .csv files, so .parquet files can still bring integer ids.
+    """
+    for key in ['application_id', 'bvn']:
+        if not pd.api.types.is_string_dtype(complete_table[key]):
+            # Through pandas' string dtype, which stringifies mixed int/str columns and keeps nulls
+            complete_table[key] = complete_table[key].astype('string').astype(STRING_DTYPE)
+    return complete_table
+
+
 def merge_complete_table(access_key: str, secret_access_key: str) -> pd.DataFrame:
     """
     Merges complete table with outcome data, filtering out declined and missing data.
@@ -245,25 +722,32 @@ def merge_complete_table(access_key: str, secret_access_key: str) -> pd.DataFram
       pd.DataFrame: Merged and processed DataFrame.
     """
     # Read complete table from S3 with potential error handling
-    complete_table = S3FileHandler('complete-table', access_key, secret_access_key).check_s3_bucket_exists()
+    complete_table = S3FileHandler('complete-table', access_key, secret_access_key).load_bucket(
+        column_types=ID_COLUMN_TYPES
+    )
 
-    # Ensure application_id and bvn columns are strings (if necessary)
-    if not pd.api.types.is_string_dtype(complete_table['application_id']):
-        complete_table['application_id'] = complete_table['application_id'].astype(str)
-    if not pd.api.types.is_string_dtype(complete_table['bvn']):
-        complete_table['bvn'] = complete_table['bvn'].astype(str)
+    complete_table = _ensure_string_ids(complete_table)
 
-    # Filter complete table (combine conditions using logical OR)
-    filtered_df = complete_table[~complete_table['decline_reason'].isna() | ~complete_table['amount_approved'].isna()]
+    # Keep the rows that already have a decline_reason or an amount_approved
+    filtered_df = complete_table[~_unprocessed_mask(complete_table)]
     
     outcome = ml_orchestrator(access_key, secret_access_key)
     # Handle cases where outcome is not provided
     if len(outcome) == 0:
         print("No outcome data provided. Merging with empty outcome data.")
         
-    # Merge on bvn and application_id (optimized using set intersection)
-    merged_df = filtered_df.merge(outcome[outcome['application_id'].isin(filtered_df['application_id'].unique())][['bvn', 'application_id', 'amount_approved','decline_reason']],
-                                   on=['bvn', 'application_id'], how='inner', suffixes=('', '_outcome'))
+    # Merge on bvn and application_id as categoricals sharing the same categories, so the join
+    # hashes integer codes; the inner join already drops outcomes without a matching application
+    outcome = outcome[['bvn', 'application_id', 'amount_approved', 'decline_reason']]
+    for key in ['bvn', 'application_id']:
+        categories = pd.api.types.union_categoricals(
+            [filtered_df[key].astype('category'), outcome[key].astype('category')]
+        ).categories
+        filtered_df = filtered_df.assign(**{key: pd.Categorical(filtered_df[key], categories=categories)})
+        outcome = outcome.assign(**{key: pd.Categorical(outcome[key], categories=categories)})
+    merged_df = filtered_df.merge(
+        outcome, on=['bvn', 'application_id'], how='inner', sort=False, suffixes=('', '_outcome')
+    )
 
     # Add new columns and reorder (consider using pipe syntax)
     merged_df['updated_date'] = pd.Timestamp.now().floor('min')
@@ -276,10 +760,10 @@ def merge_complete_table(access_key: str, secret_access_key: str) -> pd.DataFram
 
 
 def read_complete_table(access_key: str, secret_access_key: str):
-    complete_table = S3FileHandler('complete-table', access_key, secret_access_key).check_s3_bucket_exists()
-    # Ensure application_id columns are of the same type (string)
-    complete_table['application_id'] = complete_table['application_id'].astype(str)
-    complete_table['bvn'] = complete_table['bvn'].astype(str)
+    complete_table = S3FileHandler('complete-table', access_key, secret_access_key).load_bucket(
+        column_types=ID_COLUMN_TYPES
+    )
+    complete_table = _ensure_string_ids(complete_table)
     # Excluding transactions previously processed by ml services or streaming process.
-    return complete_table[(complete_table['decline_reason'].isnull()) & (complete_table['amount_approved'].isnull())].reset_index(drop=True)
+    return complete_table[_unprocessed_mask(complete_table)].reset_index(drop=True)
 
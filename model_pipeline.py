@@ -6,51 +6,97 @@
 import pandas as pd
 import numpy as np
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; model_pipeline falls back to numpy
+    njit = None
+
+# Define the weights for each column
+weights = {
+'airtime_in_90days': 0.02,
+'bill_payment_in_90days': 0.02,
+'cable_tv_in_90days': 0.02,
+'deposit_in_90days': 0.3,
+'easy_payment_in_90days': 0.02,
+'farmer_in_90days': 0.02,
+'inter_bank_in_90days': 0.02,
+'mobile_in_90days': 0.02,
+'withdrawal_in_90days': 0.5
+}
+_WEIGHT_COLS = list(weights.keys())
+_W = np.array(list(weights.values()), dtype=np.float32)
+
+DECLINE_REASONS = ['Loan declined due to defaults', 'Loan declined due to low transaction or incomplete records', ' ']
+
+
+def _encode_flag(values):
+    """Encodes a 'Y'/'N' column as int8: 1 for 'Y', 0 for 'N' and -1 for anything else."""
+    return np.where(values == 'Y', 1, np.where(values == 'N', 0, -1)).astype(np.int8)
+
+
+def _score_numpy(estimates, default, made_good):
+    """Returns amount_approved and the DECLINE_REASONS code of each row."""
+    # round to the nearest 1000
+    amount_approved = np.select(
+        [default == 0, (default == 1) & (made_good == 1), (default == 1) & (made_good == 0)],
+        [np.round(25 + 1.0*estimates, -3), np.round(25 + 0.5*estimates, -3), 0.0],
+        default=np.nan
+    ).astype(np.float32)
+    declined = amount_approved == 0
+    reason_codes = np.select([declined & (default == 1) & (made_good == 0), declined], [0, 1], default=2)
+    return amount_approved, reason_codes.astype(np.int8)
+
+
+if njit is not None:
+    @njit(parallel=True)
+    def _score_kernel(estimates, default, made_good, amount_approved, reason_codes):
+        for i in prange(estimates.shape[0]):
+            if default[i] == 0:
+                amount = np.round(25 + 1.0*estimates[i], -3)  # round to the nearest 1000
+            elif default[i] == 1 and made_good[i] == 1:
+                amount = np.round(25 + 0.5*estimates[i], -3)
+            elif default[i] == 1 and made_good[i] == 0:
+                amount = 0.0
+            else:
+                amount = np.nan
+            amount_approved[i] = amount
+
+            if amount == 0 and default[i] == 1 and made_good[i] == 0:
+                reason_codes[i] = 0
+            elif amount == 0:
+                reason_codes[i] = 1
+            else:
+                reason_codes[i] = 2
+
+    def _score(estimates, default, made_good):
+        """Returns amount_approved and the DECLINE_REASONS code of each row, one parallel pass over the rows."""
+        amount_approved = np.empty(estimates.shape[0], dtype=np.float32)
+        reason_codes = np.empty(estimates.shape[0], dtype=np.int8)
+        _score_kernel(estimates, default, made_good, amount_approved, reason_codes)
+        return amount_approved, reason_codes
+else:
+    _score = _score_numpy
+
 def model_pipeline(df):
 
-    cols = df.iloc[:,4:].select_dtypes(exclude = ['object']).columns
+    cols = df.iloc[:,4:].select_dtypes(exclude = ['object', 'category']).columns
     df[cols] = df[cols].apply(pd.to_numeric, downcast='float', errors='coerce')
 
-    # Define the weights for each column
-    weights = {
-    'airtime_in_90days': 0.02,
-    'bill_payment_in_90days': 0.02,
-    'cable_tv_in_90days': 0.02,
-    'deposit_in_90days': 0.3,
-    'easy_payment_in_90days': 0.02,
-    'farmer_in_90days': 0.02,
-    'inter_bank_in_90days': 0.02,
-    'mobile_in_90days': 0.02,
-    'withdrawal_in_90days': 0.5
-    }
-
-    # Calculate the weighted sum
-    df['estimates'] = df[list(weights.keys())].mul(list(weights.values())).sum(axis=1)
-    
-    def model_output(default_in_last_90days:str, has_it_make_it_good:str, estimates):
-        if default_in_last_90days == 'N':
-            return round(25 + 1.0*estimates, -3) # round to the nearest 1000
-        
-        elif default_in_last_90days == 'Y' and has_it_make_it_good == 'Y':
-            return round(25 + 0.5*estimates, -3)
-        
-        elif default_in_last_90days == 'Y' and has_it_make_it_good == 'N':
-            return 0
-        
-    df['amount_approved'] = df.apply(lambda x: model_output(x['default_in_last_90days']
-                                                            ,x['has_it_make_it_good']
-                                                            ,x['estimates']), axis=1)
-    
-    del df['estimates']
+    # Gather the weighted columns into one contiguous float32 matrix; all scoring runs on ndarrays
+    # and only amount_approved and decline_reason are written back to the DataFrame
+    X = np.ascontiguousarray(df[_WEIGHT_COLS].to_numpy(dtype=np.float32))
+    if np.isnan(X).any():
+        X = np.nan_to_num(X)  # missing values count as 0, as in a skipna sum
+
+    # Calculate the weighted sum as a single matrix-vector product
+    estimates = X @ _W
     
-    def decline_flag(df):
-        if (df['amount_approved'] == 0 and df['default_in_last_90days'] == 'Y' and df['has_it_make_it_good'] == 'N'):
-            return 'Loan declined due to defaults'
-        elif (df['amount_approved'] == 0):
-            return 'Loan declined due to low transaction or incomplete records'
-        else:
-            return ' '
-        
-    df['decline_reason'] = df.apply(decline_flag, axis=1)
+    default = _encode_flag(df['default_in_last_90days'].to_numpy())
+    made_good = _encode_flag(df['has_it_make_it_good'].to_numpy())
+    amount_approved, reason_codes = _score(estimates, default, made_good)
+
+    df['amount_approved'] = amount_approved
+    # Only three distinct values, so store the codes rather than one string per row
+    df['decline_reason'] = pd.Categorical.from_codes(reason_codes, categories=DECLINE_REASONS)
     
     return df
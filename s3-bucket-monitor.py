@@ -1,88 +1,416 @@
 import os
+import json
 import configparser
 import boto3
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import time
 import logging
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_plus, urlparse
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
-class S3BucketHandler(FileSystemEventHandler):
-    def __init__(self, bucket_name, credentials_file='aws_credentials.ini', required_columns=[]):
+# Number of new objects downloaded at once.
+MAX_WORKERS = 16
+# New CSV files held in memory before they are merged; larger batches are merged in several goes.
+MAX_BUFFERED_FILES = 64
+# Seconds the worker waits for more detected files before processing what it has as one batch.
+BATCH_WINDOW = 1.0
+# Polls (or SQS receives) waiting for the worker thread; polling blocks while the queue is full.
+MAX_QUEUED_POLLS = 16
+# Seconds SQS messages are kept invisible for, renewed every VISIBILITY_EXTEND_INTERVAL seconds
+# while their objects wait for the worker thread. The queue's own visibility timeout must be longer
+# than VISIBILITY_EXTEND_INTERVAL, or messages are redelivered before their first renewal.
+VISIBILITY_TIMEOUT = 60
+VISIBILITY_EXTEND_INTERVAL = 15
+# Clients shared by every handler reading the same credentials file, so they share one connection pool.
+_CLIENT_CACHE = {}
+
+
+def _queue_region(queue_url):
+    """
+    Returns the region of an SQS queue URL (https://sqs.<region>.amazonaws.com/... or the legacy
+    https://<region>.queue.amazonaws.com/...), or None when it cannot be told from the URL.
+    """
+    parts = (urlparse(queue_url).hostname or '').split('.')
+    if len(parts) > 2 and parts[0] == 'sqs':
+        return parts[1]
+    if parts[0] == 'queue':
+        return 'us-east-1'
+    if len(parts) > 2 and parts[1] == 'queue':
+        return parts[0]
+    return None
+
+class S3BucketHandler:
+    def __init__(self, bucket_name, credentials_file='aws_credentials.ini', required_columns=[], column_types=None,
+                 ordered_keys=False):
         self.bucket_name = bucket_name
         self.credentials_file = credentials_file
         self.s3 = self._load_credentials()
-        self.last_contents = set()
-        self.new_csv_files = []
+        self.sqs = None  # created on first use by poll_queue
+        self.last_contents = {}  # key -> ETag as of the last listing
+        # When new objects always sort after existing ones (e.g. timestamped keys), each poll only lists
+        # the keys after the largest key seen so far instead of diffing the whole bucket
+        self.ordered_keys = ordered_keys
+        self._max_key = ''
+        # Guards last_contents and _max_key, which the worker thread rolls back for failed files
+        self._lock = threading.Lock()
+        self.new_csv_files = deque()  # pyarrow Tables waiting to be merged
+        # Detected files waiting for the worker thread, as (keys, on_processed) items; on_processed is
+        # called with the set of keys that failed to download
+        self._queue = queue.Queue(maxsize=MAX_QUEUED_POLLS)
+        self._worker = None
+        # SQS messages received by poll_queue and not yet processed, as on_processed -> (queue_url,
+        # messages); their visibility timeout is renewed by the heartbeat thread until then
+        self._pending_messages = {}
+        self._heartbeat = None
+        self._stopped = threading.Event()
         self.required_columns = required_columns
+        # Only the required columns are parsed, with fixed pyarrow types for the known ones so every
+        # file parses to the same schema. Empty cells are read as nulls, like pd.read_csv
+        self._convert_options = pacsv.ConvertOptions(
+            include_columns=required_columns, column_types=column_types,
+            strings_can_be_null=True, quoted_strings_can_be_null=True
+        )
+
+    def _load_credentials(self, service='s3', default_region=None):
+        key = (os.path.abspath(self.credentials_file), service, default_region)
+        if key in _CLIENT_CACHE:
+            return _CLIENT_CACHE[key]
 
-    def _load_credentials(self):
         config = configparser.ConfigParser()
         config.read(self.credentials_file)
         access_key_id = config.get('aws_credentials', 'aws_access_key_id')
         secret_access_key = config.get('aws_credentials', 'aws_secret_access_key')
+        region_name = config.get('aws_credentials', 'region', fallback=default_region)
 
-        return boto3.client('s3', aws_access_key_id=access_key_id, aws_secret_access_key=secret_access_key)
+        # The pool covers the MAX_WORKERS download threads plus the listing and queue calls
+        _CLIENT_CACHE[key] = boto3.client(
+            service, aws_access_key_id=access_key_id, aws_secret_access_key=secret_access_key,
+            region_name=region_name,
+            config=Config(max_pool_connections=32, retries={'mode': 'adaptive', 'max_attempts': 10})
+        )
+        return _CLIENT_CACHE[key]
 
-    def on_any_event(self, event):
-        try:
-            current_contents = set(self._list_bucket_contents())
-            new_files = current_contents - self.last_contents
-            
-            if new_files:
-                for file in new_files:
-                    if file.endswith('.csv'):
-                        logging.info(f"Alert: New .csv file detected in bucket {self.bucket_name}: {file}")
-                        df = self._read_csv_from_s3(file)
-                        
-                        # Check for required columns
-                        missing_columns = set(self.required_columns) - set(df.columns)
-                        if missing_columns:
-                            logging.warning(f"Missing required columns in {file}: {missing_columns}")
-                        else:
-                            self.new_csv_files.append(df)
-                            logging.info(f"All required columns present in {file}")
-                            
-                        # Process the DataFrame as needed
-                        print(df.head())  # Example: Print the first few rows
+    def enable_bucket_notifications(self, queue_arn):
+        """
+        Configures the bucket to send s3:ObjectCreated:* events to the SQS queue read by poll_queue.
+        This replaces any notification configuration already set on the bucket.
+        """
+        self.s3.put_bucket_notification_configuration(
+            Bucket=self.bucket_name,
+            NotificationConfiguration={
+                'QueueConfigurations': [{'QueueArn': queue_arn, 'Events': ['s3:ObjectCreated:*']}]
+            }
+        )
 
-                    else:
-                        logging.info(f"New file detected in bucket {self.bucket_name}, but it's not a CSV file: {file}")
-            
+    def start(self):
+        """
+        Starts the worker thread that processes the files detected by poll_bucket and poll_queue.
+        """
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._process_batches, daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """
+        Processes the files already detected, then stops the worker thread.
+        """
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+        if self._heartbeat is not None:
+            self._stopped.set()
+            self._heartbeat.join()
+            self._heartbeat = None
+
+    def poll_bucket(self):
+        """
+        Lists the bucket once and hands the objects that are new or changed since the last poll to
+        the worker thread. Returns the number of such objects, 0 when the listing failed.
+
+        With ordered_keys only keys sorting after the largest key already seen are listed, so
+        overwritten objects and new keys sorting before it are not detected.
+        """
+        if self.ordered_keys:
+            return self._poll_after_max_key()
+        try:
+            current_contents = dict(self._list_bucket_contents())
+        except ClientError as e:
+            logging.info(f"Error accessing S3 bucket: {e}")
+            return 0
+        with self._lock:
+            # New keys, and keys overwritten since the last listing (their ETag changed)
+            new_files = [key for key, etag in current_contents.items() if self.last_contents.get(key) != etag]
             self.last_contents = current_contents #set the last state of the bucket.
+        if new_files:
+            self._queue.put((new_files, self._forget))
+        return len(new_files)
 
-            # Merge dataframes if multiple new CSV files were detected
-            if len(self.new_csv_files) > 1:
-                merged_df = pd.concat(self.new_csv_files, ignore_index=True)
-                logging.info(f"Merged {len(self.new_csv_files)} CSV files into a single DataFrame.")
-                merged_df = merged_df[self.required_columns]
-                merged_df = merged_df[~merged_df['application_id'].isnull()] # excluded records where application_id is null
-                merged_df.reset_index(drop=True, inplace=True)
-                merged_df['application_id'] = merged_df['application_id'].astype(int)
-                merged_df.fillna(0.0, inplace=True)
-                # Process the merged DataFrame as needed
-                print(merged_df.head())  # Example: Print the first few rows
-
-            # Clear the list of new CSV files
-            self.new_csv_files.clear()
-            
+    def _poll_after_max_key(self):
+        """
+        poll_bucket for ordered_keys: every key listed after self._max_key is new.
+        """
+        start_after = self._max_key
+        try:
+            new_files = [key for key, _ in self._list_bucket_contents(start_after)]
         except ClientError as e:
             logging.info(f"Error accessing S3 bucket: {e}")
+            return 0
+        if new_files:
+            with self._lock:
+                self._max_key = max(self._max_key, new_files[-1])  # listings are in key order
+            self._queue.put((new_files, lambda failed: self._rewind(failed, new_files, start_after)))
+        return len(new_files)
+
+    def _rewind(self, failed, new_files, start_after):
+        """
+        Moves the ordered_keys listing position back to just before the first failed key of new_files,
+        so the next poll lists it again (along with the keys after it).
+        """
+        if not failed:
+            return
+        first = next(i for i, key in enumerate(new_files) if key in failed)
+        with self._lock:
+            self._max_key = min(self._max_key, new_files[first - 1] if first else start_after)
+
+    def _forget(self, keys):
+        """
+        Drops keys from the last listing so the next poll detects them again.
+        """
+        with self._lock:
+            for key in keys:
+                self.last_contents.pop(key, None)
+
+    def poll_queue(self, queue_url, wait_time=20):
+        """
+        Long-polls an SQS queue receiving the bucket's s3:ObjectCreated:* notifications and hands the
+        new objects to the worker thread. Only the keys named in the events are read; the bucket is
+        never listed. The messages are deleted once the worker has processed their objects, and
+        kept invisible until then (see VISIBILITY_TIMEOUT). Returns after one receive, so callers
+        loop over it.
+        """
+        if self.sqs is None:
+            # SQS clients need a region; without one in the ini file, take it from the queue URL
+            self.sqs = self._load_credentials('sqs', default_region=_queue_region(queue_url))
+        if self._heartbeat is None:
+            self._stopped.clear()
+            self._heartbeat = threading.Thread(target=self._extend_visibility, daemon=True)
+            self._heartbeat.start()
+        response = self.sqs.receive_message(QueueUrl=queue_url, WaitTimeSeconds=wait_time, MaxNumberOfMessages=10)
+        messages = response.get('Messages', [])
+        message_files = []  # the keys named by each message
+        for message in messages:
+            keys = []
+            # s3:TestEvent messages sent when the notification is configured carry no Records
+            for record in json.loads(message['Body']).get('Records', []):
+                if record.get('eventName', '').startswith('ObjectCreated') and record['s3']['bucket']['name'] == self.bucket_name:
+                    keys.append(unquote_plus(record['s3']['object']['key']))
+            message_files.append(keys)
+
+        if messages:
+            new_files = [key for keys in message_files for key in keys]
+            on_processed = lambda failed: self._delete_messages(queue_url, messages, message_files, failed)
+            with self._lock:
+                self._pending_messages[on_processed] = (queue_url, messages)
+            self._queue.put((new_files, on_processed))
+
+    def _delete_messages(self, queue_url, messages, message_files, failed):
+        """
+        Deletes the messages whose objects were all processed. Messages naming a failed key are left
+        on the queue so they are delivered again.
+        """
+        entries = [
+            {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+            for i, (message, keys) in enumerate(zip(messages, message_files))
+            if not failed.intersection(keys)
+        ]
+        if entries:
+            response = self.sqs.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+            for entry in response.get('Failed', []):
+                # Most likely a stale receipt handle: the message was redelivered and will be processed again
+                logging.warning(f"Could not delete SQS message {entry['Id']} from {queue_url}: {entry.get('Message')}")
+
+    def _extend_visibility(self):
+        """
+        Heartbeat thread loop: every VISIBILITY_EXTEND_INTERVAL seconds, renews the visibility timeout
+        of the messages still waiting for the worker thread. Returns once stop() is called.
+        """
+        while not self._stopped.wait(VISIBILITY_EXTEND_INTERVAL):
+            with self._lock:
+                pending = list(self._pending_messages.values())
+            for queue_url, messages in pending:
+                entries = [
+                    {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle'], 'VisibilityTimeout': VISIBILITY_TIMEOUT}
+                    for i, message in enumerate(messages)
+                ]
+                try:
+                    response = self.sqs.change_message_visibility_batch(QueueUrl=queue_url, Entries=entries)
+                except ClientError as e:
+                    logging.warning(f"Could not extend the visibility of SQS messages on {queue_url}: {e}")
+                    continue
+                for entry in response.get('Failed', []):
+                    logging.warning(f"Could not extend the visibility of SQS message {entry['Id']} on {queue_url}: "
+                                    f"{entry.get('Message')}")
+
+    def _process_batches(self):
+        """
+        Worker thread loop: collects the detected files for up to BATCH_WINDOW seconds (or until
+        MAX_BUFFERED_FILES are waiting), processes them as one batch and tells each item which of its
+        keys failed. Returns after stop() is called and the queue is drained.
+        """
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            items, stopping = [item], False
+            deadline = time.monotonic() + BATCH_WINDOW
+            while sum(len(keys) for keys, _ in items) < MAX_BUFFERED_FILES:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                items.append(item)
 
-    def _list_bucket_contents(self):
+            try:
+                failed = self._process_new_files([key for keys, _ in items for key in keys])
+            except Exception:
+                # Keep the worker alive. Polled files are not retried, since they would most likely
+                # fail again; queue messages are left for SQS to redeliver or dead-letter.
+                logging.exception(f"Failed to process new files from bucket {self.bucket_name}")
+                failed = None
+            with self._lock:
+                # Processed or not, the items' messages are no longer kept invisible; unprocessed
+                # ones are redelivered once their visibility timeout runs out
+                for _, on_processed in items:
+                    self._pending_messages.pop(on_processed, None)
+            if failed is not None:
+                for keys, on_processed in items:
+                    on_processed(failed.intersection(keys))
+            if stopping:
+                return
+
+    def _process_new_files(self, new_files):
+        """
+        Downloads, merges and processes the new .csv files. Returns the set of keys that could not be
+        downloaded; the other files are processed without them.
+        """
+        csv_files = []
+        failed = set()
+
+        def read(file):
+            try:
+                return self._read_required_columns(file)
+            except ClientError as e:
+                logging.info(f"Error reading {file} from S3 bucket: {e}")
+                failed.add(file)
+                return None
+
+        for file in new_files:
+            if file.endswith('.csv'):
+                logging.info(f"Alert: New .csv file detected in bucket {self.bucket_name}: {file}")
+                csv_files.append(file)
+            else:
+                logging.info(f"New file detected in bucket {self.bucket_name}, but it's not a CSV file: {file}")
+
+        merged_early = False
         try:
-            response = self.s3.list_objects_v2(Bucket=self.bucket_name)
-            return [obj['Key'] for obj in response.get('Contents', [])]
+            # Download and parse the new files concurrently, at most MAX_BUFFERED_FILES at a time so
+            # memory stays bounded; results come back in csv_files order
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+                for start in range(0, len(csv_files), MAX_BUFFERED_FILES):
+                    batch = csv_files[start:start + MAX_BUFFERED_FILES]
+                    for file, table in zip(batch, pool.map(read, batch)):
+                        if table is None:
+                            continue
+                        self.new_csv_files.append(table)
+                        logging.info(f"All required columns present in {file}")
+
+                        # Process the DataFrame as needed
+                        print(table.slice(0, 5).to_pandas())  # Example: Print the first few rows
+
+                    if len(self.new_csv_files) >= MAX_BUFFERED_FILES:
+                        self._merge_new_csv_files()
+                        merged_early = True
+
+            # Once part of this batch was merged, a single leftover file is merged too
+            self._merge_new_csv_files(min_files=1 if merged_early else 2)
+        finally:
+            # Clear the list of new CSV files, even when reading one of them failed
+            self.new_csv_files.clear()
+        return failed
+
+    def _merge_new_csv_files(self, min_files=2):
+        # Merge dataframes if at least min_files new CSV files were detected
+        if len(self.new_csv_files) >= min_files:
+            tables = list(self.new_csv_files)
+            logging.info(f"Merged {len(self.new_csv_files)} CSV files into a single DataFrame.")
+            # Columns were projected and null application_id rows dropped when each file was read
+            try:
+                table = pa.concat_tables(tables, promote_options='permissive')
+                merged_df = table.to_pandas(types_mapper=pd.ArrowDtype, self_destruct=True)
+            except (pa.ArrowTypeError, pa.ArrowInvalid):
+                # A column without a fixed type was inferred differently across files; pd.concat
+                # upcasts it where Arrow refuses to merge
+                merged_df = pd.concat([part.to_pandas(types_mapper=pd.ArrowDtype) for part in tables], ignore_index=True)
+            merged_df['application_id'] = merged_df['application_id'].astype(int)
+            merged_df.fillna(0.0, inplace=True)
+            # Process the merged DataFrame as needed
+            print(merged_df.head())  # Example: Print the first few rows
+
+        self.new_csv_files.clear()
+
+    def _list_bucket_contents(self, start_after=''):
+        """
+        Yields (key, ETag) for every object in the bucket whose key sorts after start_after, one page
+        of up to 1000 keys at a time.
+        """
+        paginator = self.s3.get_paginator('list_objects_v2')
+        params = {'Bucket': self.bucket_name, 'PaginationConfig': {'PageSize': 1000}}
+        if start_after:
+            params['StartAfter'] = start_after
+        try:
+            for page in paginator.paginate(**params):
+                for obj in page.get('Contents', []):
+                    yield obj['Key'], obj['ETag']
         except ClientError as e:
             # Handle bucket not found error here (e.response['Error']['Code'] == 'NoSuchBucket')
             logging.error(f"Bucket {self.bucket_name} does not exist or access denied: {e}")
-            return []  # Return an empty list to avoid further errors
+            raise  # a partial listing must not be mistaken for the bucket's contents
+
+    def _read_required_columns(self, file_key):
+        """
+        Reads a new file keeping only the required columns and the rows with an application_id.
+        Returns None, after logging a warning, when the file lacks a required column or was deleted
+        before it could be read (e.g. by clean_ml_bucket).
+        """
+        try:
+            table = self._read_csv_from_s3(file_key)
+        except pa.ArrowKeyError as e:
+            logging.warning(f"Missing required columns in {file_key}: {e}")
+            return None
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') not in ('NoSuchKey', '404'):
+                raise
+            logging.warning(f"{file_key} no longer exists in bucket {self.bucket_name}, skipping it")
+            return None
+        if 'application_id' in table.column_names:
+            table = table.filter(pc.field('application_id').is_valid()) # excluded records where application_id is null
+        return table
 
     def _read_csv_from_s3(self, file_key):
         obj = self.s3.get_object(Bucket=self.bucket_name, Key=file_key)
-        df = pd.read_csv(obj['Body'])
-        return df
+        return pacsv.read_csv(obj['Body'], convert_options=self._convert_options)
 
     @staticmethod
     def convert_columns(df, column_types):
@@ -96,35 +424,61 @@ class S3BucketHandler(FileSystemEventHandler):
         Returns:
         pd.DataFrame: The DataFrame with converted columns.
         """
-        for col, dtype in column_types.items():
-            if col in df.columns:
-                if dtype == 'date':
-                    df[col] = pd.to_datetime(df[col]).dt.date
-                else:
-                    df[col] = df[col].astype(dtype)
-            else:
+        for col in column_types:
+            if col not in df.columns:
                 print(f"Warning: Column '{col}' does not exist in the DataFrame.")
+        date_cols = [col for col, dtype in column_types.items() if dtype == 'date' and col in df.columns]
+        for col in date_cols:
+            # Midnight timestamps keep the calendar date without boxing datetime.date objects
+            df[col] = pd.to_datetime(df[col]).dt.normalize()
+        # Convert every other column in one astype call
+        astype_map = {col: dtype for col, dtype in column_types.items() if dtype != 'date' and col in df.columns}
+        if astype_map:
+            df = df.astype(astype_map)
         return df
 
-def monitor_s3_bucket(bucket_name, interval=10, required_columns=[]):
-    handler = S3BucketHandler(bucket_name, required_columns=required_columns)
-    observer = Observer()
-    observer.schedule(handler, path='.', recursive=False)
+def monitor_s3_bucket(bucket_name, interval=30, max_interval=300, required_columns=[], queue_url=None,
+                      column_types=None, ordered_keys=False):
+    """
+    Processes new .csv objects arriving in the bucket until interrupted.
 
+    With queue_url, new objects are read from the bucket's ObjectCreated events on that SQS queue.
+    Otherwise the bucket is listed every interval seconds; the wait doubles after each poll that finds
+    nothing, up to max_interval, and drops back to interval as soon as a new object shows up. Set
+    ordered_keys when new keys always sort after existing ones, so each poll lists only the new keys.
+    """
+    handler = S3BucketHandler(bucket_name, required_columns=required_columns, column_types=column_types,
+                              ordered_keys=ordered_keys)
+    if queue_url:
+        # Event-driven mode: the bucket sends its ObjectCreated events to queue_url, so nothing is polled
+        logging.info(f"Listening for new objects in bucket {bucket_name} on {queue_url}.")
+        handler.start()
+        try:
+            while True:
+                handler.poll_queue(queue_url)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            handler.stop()
+        return
+
+    # Check bucket existence and credential validity before starting monitoring
     try:
-        # Check bucket existence and credential validity before starting monitoring
-        if not handler._list_bucket_contents():
-            logging.error(f"Bucket {bucket_name} does not exist or access denied.")
-            return
+        next(handler._list_bucket_contents(), None)
+    except ClientError:
+        return
 
-        logging.info(f"Bucket {bucket_name} exists and access successful. Starting monitoring.")
-        observer.start()
-        
+    logging.info(f"Bucket {bucket_name} exists and access successful. Starting monitoring.")
+    handler.start()
+    wait = interval
+    try:
         while True:
-            time.sleep(interval)
+            wait = interval if handler.poll_bucket() else min(wait * 2, max_interval)
+            time.sleep(wait)
     except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
+        pass
+    finally:
+        handler.stop()
 
 if __name__ == "__main__":
     bucket_name = "scetru-ml-bucket"
@@ -134,5 +488,14 @@ if __name__ == "__main__":
         'farmer_in_90days', 'inter_bank_in_90days', 'mobile_in_90days', 'utility_bills_in_90days',
         'withdrawal_in_90days'
     ]
+    # Fixed pyarrow types for every required column, so all files parse to the same schema. bvn and
+    # date_created stay strings; convert_columns parses the dates
+    column_types = {
+        'bvn': pa.string(), 'application_id': pa.float64(), 'date_created': pa.string(),
+        'amount_requested': pa.float32()
+    }
+    column_types.update({col: pa.float32() for col in required_columns[4:]})
+    # SQS queue receiving the bucket's ObjectCreated events; the bucket is polled when it is not set
+    queue_url = os.environ.get('S3_EVENTS_QUEUE_URL')
     logging.basicConfig(level=logging.INFO)  # Configure logging level
-    monitor_s3_bucket(bucket_name, required_columns=required_columns)
+    monitor_s3_bucket(bucket_name, required_columns=required_columns, queue_url=queue_url, column_types=column_types)
@@ -0,0 +1,211 @@
+import io
+import os
+import sys
+import unittest
+from unittest import mock
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import file_handler
+
+
+class FakeS3Client:
+    """
+    In-memory stand-in for the boto3 S3 client calls used by S3FileHandler.
+    Listings are paged page_size keys at a time, and every page is counted in lists.
+    Keys listed in fail_once raise a SlowDown error on their next get_object.
+    """
+    def __init__(self, objects, page_size=1000):
+        self.objects = objects
+        self.page_size = page_size
+        self.fail_once = set()
+        self.gets = []
+        self.lists = 0
+
+    def head_bucket(self, Bucket):
+        return {}
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix='', StartAfter='', **kwargs):
+        keys = sorted(key for key in self.objects if key.startswith(Prefix) and key > StartAfter)
+        for start in range(0, max(len(keys), 1), self.page_size):
+            self.lists += 1
+            page = keys[start:start + self.page_size]
+            yield {
+                'IsTruncated': start + self.page_size < len(keys),
+                'Contents': [{'Key': key, 'ETag': '"%x"' % hash(self.objects[key])} for key in page]
+            }
+
+    def get_object(self, Bucket, Key, Range=None):
+        self.gets.append(Key)
+        if Key in self.fail_once:
+            self.fail_once.discard(Key)
+            raise ClientError({'Error': {'Code': 'SlowDown'}}, 'GetObject')
+        data = self.objects[Key]
+        return {'Body': io.BytesIO(data), 'ContentLength': len(data)}
+
+    def delete_objects(self, Bucket, Delete):
+        for obj in Delete['Objects']:
+            self.objects.pop(obj['Key'], None)
+        return {}
+
+
+class ClientCacheTest(unittest.TestCase):
+    def test_default_credential_chain_is_allowed(self):
+        with mock.patch.object(file_handler.boto3, 'client') as client:
+            handler = file_handler.S3FileHandler('bucket', None, None)
+            self.assertIs(file_handler._get_s3_client(None, None), handler.s3_client)
+        client.assert_called_once()
+        self.assertEqual(handler._bucket_key(), ('bucket', None))
+        file_handler._CLIENT_CACHE.pop((None, None), None)
+
+
+class LoadBucketTest(unittest.TestCase):
+    def setUp(self):
+        file_handler._BUCKET_CACHE.clear()
+        self.client = FakeS3Client({
+            'a.csv': b'bvn,amount\n1,10\n',
+            'b.csv': b'bvn,amount\n2,20\n',
+        })
+        with mock.patch.object(file_handler, '_get_s3_client', return_value=self.client):
+            self.handler = file_handler.S3FileHandler('bucket', 'key', 'secret')
+
+    def test_unchanged_bucket_is_not_downloaded_again(self):
+        first = self.handler.load_bucket()
+        self.client.gets.clear()
+        second = self.handler.load_bucket()
+        self.assertEqual(self.client.gets, [])
+        self.assertTrue(first.equals(second))
+
+    def test_changed_file_is_downloaded_again(self):
+        self.handler.load_bucket()
+        self.client.gets.clear()
+        self.client.objects['b.csv'] = b'bvn,amount\n2,25\n'
+        df = self.handler.load_bucket()
+        self.assertEqual(self.client.gets, ['b.csv'])
+        self.assertEqual(sorted(df['amount'].tolist()), [10, 25])
+
+    def test_failed_download_is_retried_on_next_load(self):
+        self.client.fail_once.add('b.csv')
+        df = self.handler.load_bucket()
+        self.assertEqual(df['file_key'].tolist(), ['a.csv'])
+
+        self.client.objects['c.csv'] = b'bvn,amount\n3,30\n'
+        df = self.handler.load_bucket()
+        self.assertEqual(sorted(df['file_key'].tolist()), ['a.csv', 'b.csv', 'c.csv'])
+
+
+class CleanBucketTest(unittest.TestCase):
+    def setUp(self):
+        file_handler._LISTING_CACHE.clear()
+
+    def test_file_that_failed_to_read_is_not_deleted(self):
+        client = FakeS3Client({
+            'a.csv': b'bvn,amount\n1,10\n',
+            'b.csv': b'bvn,amount\n2,20\n',
+            'c.parquet': b'',
+        })
+        client.fail_once.add('b.csv')
+        with mock.patch.object(file_handler, '_get_s3_client', return_value=client):
+            handler = file_handler.S3FileHandler('bucket', 'key', 'secret')
+        with mock.patch.object(handler, 'read_parquet_from_s3', return_value=file_handler.pd.DataFrame()):
+            handler.check_s3_bucket_exists()
+        handler.clean_ml_bucket()
+        self.assertEqual(sorted(client.objects), ['b.csv'])
+
+
+class ListFilesTest(unittest.TestCase):
+    def list_files(self, keys, page_size=10):
+        client = FakeS3Client(dict.fromkeys(keys, b''), page_size=page_size)
+        with mock.patch.object(file_handler, '_get_s3_client', return_value=client):
+            handler = file_handler.S3FileHandler('bucket', 'key', 'secret')
+        return handler._list_files(file_handler.READ_SUFFIXES), client
+
+    def test_bucket_within_shard_after_pages_is_paged_sequentially(self):
+        keys = [f'{i:04d}.csv' for i in range(10 * file_handler.SHARD_AFTER_PAGES)]
+        files, client = self.list_files(keys)
+        self.assertEqual(files, keys)
+        self.assertEqual(client.lists, file_handler.SHARD_AFTER_PAGES)
+
+    def test_sharded_listing_returns_every_key(self):
+        # Keys spread over characters the boundaries are not placed on, and keys sorting after them
+        chars = 'aZ9-_.~é/'
+        keys = [f'app_{a}{b}{c}.csv' for a in chars for b in chars for c in '0x']
+        keys += ['complete/1.parquet', 'zz.csv', '\u00ff.csv', 'notes.txt']
+        files, client = self.list_files(keys)
+        self.assertEqual(files, sorted(key for key in keys if key.endswith(file_handler.READ_SUFFIXES)))
+        pages = -(-len(keys) // 10)
+        self.assertLessEqual(client.lists, pages + file_handler.MAX_WORKERS + 1)
+
+    def test_shard_bounds_follow_the_listed_keys(self):
+        listed_keys = [f'app_{i:03d}' for i in range(0, 500, 7)]
+        bounds = file_handler._shard_bounds(listed_keys)
+        self.assertEqual(bounds, sorted(bounds))
+        self.assertTrue(all(bound > listed_keys[-1] for bound in bounds))
+        self.assertLessEqual(len(bounds), file_handler.MAX_WORKERS)
+        self.assertIn('app_5', bounds)
+
+
+class ReadCsvTest(unittest.TestCase):
+    def test_column_inferred_with_different_types_is_upcast(self):
+        client = FakeS3Client({
+            'a.csv': b'date_created,amount\n2024-01-01,10\n',
+            'b.csv': b'date_created,amount\n2024-01-01 10:00:00,20\n',
+        })
+        with mock.patch.object(file_handler, '_get_s3_client', return_value=client):
+            handler = file_handler.S3FileHandler('bucket', 'key', 'secret')
+        df = handler.read_csv_from_s3(['a.csv', 'b.csv'])
+        self.assertEqual(df['amount'].tolist(), [10, 20])
+        self.assertEqual(df['file_key'].tolist(), ['a.csv', 'b.csv'])
+
+
+class ReadDataTest(unittest.TestCase):
+    def setUp(self):
+        file_handler._LISTING_CACHE.clear()
+
+    def test_file_missing_a_column_is_filled_with_zeros(self):
+        header = (
+            'bvn,application_id,amount_requested,date_created,airtime_in_90days,bill_payment_in_90days,'
+            'cable_tv_in_90days,deposit_in_90days,easy_payment_in_90days,farmer_in_90days,'
+            'inter_bank_in_90days,mobile_in_90days,utility_bills_in_90days,withdrawal_in_90days'
+        )
+        row = '22000000001,1001,5000,2024-01-01,1,2,3,4,5,6,7,8,9,10'
+        # b.csv lacks utility_bills_in_90days
+        missing = header.replace(',utility_bills_in_90days', '')
+        missing_row = '22000000002,1002,6000,2024-01-02,1,2,3,4,5,6,7,8,10'
+        client = FakeS3Client({
+            'a.csv': f'{header}\n{row}\n'.encode(),
+            'b.csv': f'{missing}\n{missing_row}\n'.encode(),
+        })
+        with mock.patch.object(file_handler, '_get_s3_client', return_value=client):
+            processor = file_handler.ApplicationProcessor('bucket', 'key', 'secret')
+        df = processor.read_data()
+        self.assertEqual(df['application_id'].tolist(), [1001, 1002])
+        self.assertEqual(df['utility_bills_in_90days'].tolist(), [9.0, 0.0])
+        self.assertEqual(df['withdrawal_in_90days'].tolist(), [10.0, 10.0])
+
+
+class CompleteTableTest(unittest.TestCase):
+    def setUp(self):
+        file_handler._BUCKET_CACHE.clear()
+        file_handler._LISTING_CACHE.clear()
+
+    def test_row_with_empty_decline_reason_is_unprocessed(self):
+        client = FakeS3Client({
+            'complete.csv': (
+                b'application_id,bvn,decline_reason,amount_approved\n'
+                b'1000,22000000000,Low score,\n'
+                b'1001,22000000001,,\n'
+                b'1002,22000000002,"",\n'
+            ),
+        })
+        with mock.patch.object(file_handler, '_get_s3_client', return_value=client):
+            df = file_handler.read_complete_table('key', 'secret')
+        self.assertEqual(df['application_id'].tolist(), ['1001', '1002'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import itertools
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import model_pipeline
+
+
+class ScoreTest(unittest.TestCase):
+    @unittest.skipIf(model_pipeline.njit is None, "numba is not installed, so _score is _score_numpy")
+    def test_numba_kernel_matches_numpy(self):
+        # Estimates that round to 0 (so approve nothing), halfway cases, negatives, large values and NaN
+        estimate_values = [
+            np.nan, 0.0, -25.0, -50.0, -525.0, 475.0, 950.0, 1475.0, 2975.0, 12345.67, 1234567.5, 3.4e7
+        ]
+        flags = [1, 0, -1]
+        rows = list(itertools.product(estimate_values, flags, flags))
+        estimates = np.array([row[0] for row in rows], dtype=np.float32)
+        default = np.array([row[1] for row in rows], dtype=np.int8)
+        made_good = np.array([row[2] for row in rows], dtype=np.int8)
+
+        expected_amounts, expected_codes = model_pipeline._score_numpy(estimates, default, made_good)
+        amounts, codes = model_pipeline._score(estimates, default, made_good)
+
+        np.testing.assert_array_equal(amounts, expected_amounts)
+        np.testing.assert_array_equal(codes, expected_codes)
+        self.assertEqual(amounts.dtype, expected_amounts.dtype)
+        self.assertEqual(codes.dtype, expected_codes.dtype)
+
+    def test_flags_are_encoded(self):
+        values = np.array(['Y', 'N', None, 'y', ''], dtype=object)
+        self.assertEqual(model_pipeline._encode_flag(values).tolist(), [1, 0, -1, -1, -1])
+
+
+if __name__ == '__main__':
+    unittest.main()
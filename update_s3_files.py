@@ -1,34 +1,57 @@
 import os
 import boto3
+from boto3.s3.transfer import TransferConfig
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import NoCredentialsError
 from credentials import *
 
+# Number of files written or uploaded concurrently.
+MAX_WORKERS = 16
+# Files larger than the threshold are uploaded as multipart uploads of concurrent parts.
+TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=16)
+# S3 client shared by every upload, so they reuse one connection pool.
+_S3_CLIENT = None
+
+
+def _get_s3_client():
+    """
+    Returns the S3 client used for uploads, creating it on first use.
+    """
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        session = boto3.Session(
+                aws_access_key_id=access_key,
+                aws_secret_access_key=secret_access_key)
+        _S3_CLIENT = session.client('s3', config=Config(max_pool_connections=64))
+    return _S3_CLIENT
+
+
 def saved_processed_data_as_csv(df_outcome):
     if len(df_outcome) > 0:
         # Ensure the directory to save the files exists
         output_dir = 'processed_loan_request'
         os.makedirs(output_dir, exist_ok=True)
 
-        # Iterate over each unique application_id and save records to separate CSV files
-        for application_id, group in df_outcome.groupby('application_id'):
-            # Define the file path locally
+        # Save the records of each unique application_id to a separate CSV file; the groups are
+        # written concurrently since most of the time goes to small file writes
+        def save_group(item):
+            application_id, group = item
             local_file_path = os.path.join(output_dir, f"{application_id}.csv")
-
-            # Save the group to a CSV file
             group.to_csv(local_file_path, index=False)
 
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            list(pool.map(save_group, df_outcome.groupby('application_id', sort=False, observed=True)))
+
         print("Files saved successfully.")
 
 
-def upload_to_s3(local_file, bucket, s3_file):
-    session = boto3.Session(
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_access_key)
-    
-    s3 = session.client('s3')
+def upload_to_s3(local_file, bucket, s3_file, s3=None):
+    if s3 is None:
+        s3 = _get_s3_client()
     
     try:
-        s3.upload_file(local_file, bucket, s3_file)
+        s3.upload_file(local_file, bucket, s3_file, Config=TRANSFER_CONFIG)
         print(f"Upload Successful: {local_file}")
         return True
     except FileNotFoundError:
@@ -54,19 +77,23 @@ def upload_csv_files(folder_path, bucket_name, s3_path_prefix, files_to_upload):
     all_files = os.listdir(folder_path)
 
     # Filter for CSV files
+    files_to_upload = set(files_to_upload)
     csv_files = [
         file for file in all_files 
         if file.endswith('.csv') and os.path.splitext(file)[0] in files_to_upload
     ]
     
-    # Upload each CSV file
-    for filename in csv_files:
+    # Upload each CSV file, several at a time over one shared client
+    s3 = _get_s3_client()
+
+    def upload(filename):
         local_file = os.path.join(folder_path, filename)
         s3_file = os.path.join(s3_path_prefix, filename) if s3_path_prefix else filename
+        if upload_to_s3(local_file, bucket_name, s3_file, s3=s3):
+            print(f"Upload Successful: from {local_file} into {s3_file}")
 
-    # Call your upload_to_s3 function (modify for your specific implementation)
-    upload_to_s3(local_file, bucket_name, s3_file)
-    print(f"Upload Successful: from {local_file} into {s3_file}")
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        list(pool.map(upload, csv_files))
 
     # Inform about no CSV files found (optional)
     if not csv_files: